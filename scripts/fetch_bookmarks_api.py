@@ -6,7 +6,7 @@ Fallback for when bird CLI is unavailable. Uses OAuth 2.0 tokens
 managed by x_api_auth.py.
 
 Usage:
-    python3 fetch_bookmarks_api.py [--count 20] [--all] [--since-id ID]
+    python3 fetch_bookmarks_api.py [--count 20] [--all] [--since-id ID | --new]
 
 Output: JSON array of bookmarks matching bird CLI format for compatibility.
 
@@ -19,86 +19,171 @@ import argparse
 import json
 import os
 import sys
+import time
+import urllib.error
 import urllib.parse
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
+try:
+    import orjson  # optional: much faster JSON parsing/serialization
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # optional: stream-parse pages instead of buffering the body
+except ImportError:
+    ijson = None
+
 # Import auth helper (same directory)
 sys.path.insert(0, str(Path(__file__).parent))
-from x_api_auth import get_valid_token, load_tokens, load_config
+from x_api_auth import (
+    TOKEN_DIR, api_request, cache_user_id, get_valid_token, load_tokens, load_config,
+    write_json_atomic,
+)
 
 BASE_URL = "https://api.x.com/2"
 MAX_RESULTS_PER_PAGE = 100  # X API max
+STATE_FILE = TOKEN_DIR / "since.json"
+MAX_RETRIES = 5
+MAX_RATE_LIMIT_WAIT = 15 * 60  # seconds; X rate-limit windows are 15 minutes
+
+json_loads = orjson.loads if orjson else json.loads
+
+_EMPTY = {}  # shared read-only default for missing nested objects
+
+# Field selection is the same for every page, so encode it once
+_STATIC_QS = urllib.parse.urlencode((
+    ("tweet.fields", "created_at,public_metrics,referenced_tweets,attachments"),
+    ("user.fields", "username,name"),
+    ("media.fields", "type,url,preview_image_url"),
+    ("expansions", "author_id,attachments.media_keys,referenced_tweets.id,referenced_tweets.id.author_id"),
+))
+
+
+def load_since_id() -> str | None:
+    """Newest tweet ID seen by a previous --new run."""
+    if not STATE_FILE.exists():
+        return None
+    try:
+        since_id = json.loads(STATE_FILE.read_text()).get("since_id")
+    except (json.JSONDecodeError, AttributeError):
+        return None  # unreadable state: behave like a first run
+    if not (isinstance(since_id, str) and since_id.isascii() and since_id.isdigit()):
+        return None
+    return since_id
+
+
+def save_since_id(bookmarks: list):
+    """Remember the newest bookmark ID so the next --new run starts after it."""
+    if not bookmarks:
+        return
+    newest = max((b["id"] for b in bookmarks), key=int)
+    previous = load_since_id()
+    if previous and int(previous) >= int(newest):
+        return
+    TOKEN_DIR.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(STATE_FILE, {"since_id": newest})
 
 
 def get_me(token: str) -> str:
     """Get authenticated user's ID."""
-    req = urllib.request.Request(f"{BASE_URL}/users/me")
-    req.add_header("Authorization", f"Bearer {token}")
-    with urllib.request.urlopen(req) as resp:
-        data = json.loads(resp.read())
+    headers = {"Authorization": f"Bearer {token}"}
+    with api_request("GET", f"{BASE_URL}/users/me", headers) as resp:
+        data = json_loads(resp.read())
         return data["data"]["id"]
 
 
 def fetch_bookmarks_page(
-    token: str, user_id: str, max_results: int = 20,
-    pagination_token: str = None, since_id: str = None
+    token: str, user_id: str, max_results: int = 20, pagination_token: str = None
 ) -> dict:
     """Fetch a single page of bookmarks."""
-    params = {
-        "max_results": min(max_results, MAX_RESULTS_PER_PAGE),
-        "tweet.fields": "created_at,public_metrics,entities,conversation_id,referenced_tweets",
-        "user.fields": "username,name,profile_image_url,verified",
-        "media.fields": "type,url,preview_image_url",
-        "expansions": "author_id,attachments.media_keys,referenced_tweets.id",
-    }
+    params = [("max_results", min(max_results, MAX_RESULTS_PER_PAGE))]
     if pagination_token:
-        params["pagination_token"] = pagination_token
-    if since_id:
-        params["since_id"] = since_id
+        params.append(("pagination_token", pagination_token))
 
-    qs = urllib.parse.urlencode(params)
+    qs = f"{_STATIC_QS}&{urllib.parse.urlencode(params)}"
     url = f"{BASE_URL}/users/{user_id}/bookmarks?{qs}"
 
-    req = urllib.request.Request(url)
-    req.add_header("Authorization", f"Bearer {token}")
-
-    with urllib.request.urlopen(req) as resp:
-        return json.loads(resp.read())
-
-
-def normalize_tweet(tweet: dict, users: dict, media: dict) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with api_request("GET", url, headers) as resp:
+        if ijson and not orjson:
+            # Without orjson, stream-parse so the raw body is never held in
+            # memory alongside the parsed page. (Tweets reference users/media
+            # in "includes", which arrives after "data", so the page is still
+            # assembled before normalizing.) orjson is ~4x faster, so it wins.
+            return dict(ijson.kvitems(resp, "", use_float=True))
+        return json_loads(resp.read())
+
+
+def retry_delay(error: urllib.error.HTTPError, attempt: int) -> float:
+    """Seconds to wait before retrying a rate-limited or failed request."""
+    if error.code != 429:
+        return min(60, 2 ** attempt)
+
+    wait = 2 ** attempt
+    reset = error.headers.get("x-rate-limit-reset")  # unix timestamp
+    retry_after = error.headers.get("Retry-After")
+    try:
+        if reset:
+            wait = float(reset) - time.time()
+        elif retry_after:
+            wait = float(retry_after)
+    except ValueError:
+        pass
+    return min(max(wait, 1), MAX_RATE_LIMIT_WAIT)
+
+
+def parse_timestamp(value: str) -> int:
+    """X API ISO-8601 timestamp -> Unix epoch seconds (0 if missing or malformed)."""
+    if not value:
+        return 0
+    try:
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return 0
+
+
+def normalize_tweet(tweet: dict, users: dict, media: dict, referenced: dict = _EMPTY) -> dict:
     """Convert X API v2 tweet to bird-CLI-compatible format."""
-    author_id = tweet.get("author_id", "")
-    author = users.get(author_id, {})
-    metrics = tweet.get("public_metrics", {})
+    author = users.get(tweet.get("author_id", ""), _EMPTY)
+    metric = tweet.get("public_metrics", _EMPTY).get
 
     # Resolve media
-    media_list = []
-    media_keys = tweet.get("attachments", {}).get("media_keys", [])
-    for mk in media_keys:
-        m = media.get(mk, {})
-        if m:
-            media_list.append({
-                "type": m.get("type", "photo"),
-                "url": m.get("url") or m.get("preview_image_url", ""),
-            })
-
-    # Resolve quoted tweet
-    quoted = None
-    for ref in tweet.get("referenced_tweets", []):
-        if ref.get("type") == "quoted":
-            quoted = {"id": ref["id"]}
+    media_keys = tweet.get("attachments", _EMPTY).get("media_keys", ())
+    media_list = [
+        {"type": m.get("type", "photo"), "url": m.get("url") or m.get("preview_image_url", "")}
+        for m in map(media.get, media_keys)
+        if m
+    ]
+
+    # Resolve quoted tweet from the referenced_tweets.id expansion
+    quoted = next(
+        ({"id": ref["id"]} for ref in tweet.get("referenced_tweets", ()) if ref.get("type") == "quoted"),
+        None,
+    )
+    if quoted and quoted["id"] in referenced:
+        qt = referenced[quoted["id"]]
+        qt_author = users.get(qt.get("author_id", ""), _EMPTY)
+        quoted["text"] = qt.get("text", "")
+        quoted["createdAt"] = qt.get("created_at", "")
+        quoted["author"] = {
+            "username": qt_author.get("username", ""),
+            "name": qt_author.get("name", ""),
+        }
 
     result = {
         "id": tweet["id"],
         "text": tweet.get("text", ""),
         "createdAt": tweet.get("created_at", ""),
-        "replyCount": metrics.get("reply_count", 0),
-        "retweetCount": metrics.get("retweet_count", 0),
-        "likeCount": metrics.get("like_count", 0),
-        "bookmarkCount": metrics.get("bookmark_count", 0),
-        "viewCount": metrics.get("impression_count", 0),
+        "createdAtEpoch": parse_timestamp(tweet.get("created_at", "")),
+        "replyCount": metric("reply_count", 0),
+        "retweetCount": metric("retweet_count", 0),
+        "likeCount": metric("like_count", 0),
+        "bookmarkCount": metric("bookmark_count", 0),
+        "viewCount": metric("impression_count", 0),
         "author": {
             "username": author.get("username", ""),
             "name": author.get("name", ""),
@@ -111,61 +196,147 @@ def normalize_tweet(tweet: dict, users: dict, media: dict) -> dict:
     return result
 
 
-def fetch_all_bookmarks(token: str, count: int = 20, all_pages: bool = False, since_id: str = None) -> list:
-    """Fetch bookmarks with pagination support."""
-    user_id = get_me(token)
+def normalize_page(tweets: list, includes: dict) -> list:
+    """Normalize one API response page's tweets against its includes."""
+    # Build lookup maps from includes once per page
+    users = {u["id"]: u for u in includes.get("users", ())}
+    media = {m["media_key"]: m for m in includes.get("media", ())}
+    referenced = {t["id"]: t for t in includes.get("tweets", ())}
+    return [
+        normalize_tweet(tweet, users, media, referenced)
+        for tweet in tweets
+    ]
+
+
+def fetch_all_bookmarks(
+    token: str, count: int = 20, all_pages: bool = False,
+    since_id: str = None, user_id: str = None
+) -> tuple[list, bool]:
+    """Fetch bookmarks with pagination support.
+
+    Returns (bookmarks, complete); complete is False when pages were left
+    unfetched, either because the count was reached or rate limiting won.
+
+    The bookmarks endpoint has no since_id parameter and lists tweets in
+    bookmark order, so since_id is applied here to each page and does not
+    end pagination early.
+
+    The next page is requested in the background as soon as its cursor is
+    known, so network time overlaps with normalizing the current page.
+    Rate limits and server errors are retried in place, keeping the cursor,
+    so no pages are fetched twice. Retry waits happen on the calling thread,
+    never in the worker, so Ctrl-C interrupts them.
+    """
     bookmarks = []
-    pagination_token = None
-    remaining = count if not all_pages else float("inf")
-
-    while remaining > 0:
-        page_size = min(int(remaining), MAX_RESULTS_PER_PAGE)
-        try:
-            response = fetch_bookmarks_page(
-                token, user_id, page_size, pagination_token, since_id
-            )
-        except urllib.error.HTTPError as e:
-            if e.code == 429:
-                print("Rate limited. Try again later.", file=sys.stderr)
+    complete = False
+    newer_than = int(since_id) if since_id else None
+    remaining = None if all_pages else count  # None: no limit
+    if remaining is not None and remaining <= 0:
+        return bookmarks, complete
+
+    if not user_id:
+        user_id = get_me(token)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page_size = MAX_RESULTS_PER_PAGE if remaining is None else min(remaining, MAX_RESULTS_PER_PAGE)
+        cursor = None
+        pending = executor.submit(fetch_bookmarks_page, token, user_id, page_size, cursor)
+        attempt = 0
+
+        while pending is not None:
+            try:
+                response = pending.result()
+            except urllib.error.HTTPError as e:
+                if attempt < MAX_RETRIES and (e.code == 429 or e.code >= 500):
+                    delay = retry_delay(e, attempt)
+                    print(f"HTTP {e.code} from X API, retrying in {delay:.0f}s...", file=sys.stderr)
+                    time.sleep(delay)
+                    attempt += 1
+                    pending = executor.submit(fetch_bookmarks_page, token, user_id, page_size, cursor)
+                    continue
+                if e.code == 429:
+                    print(
+                        f"Still rate limited after {MAX_RETRIES} retries; "
+                        f"returning {len(bookmarks)} bookmarks fetched so far.",
+                        file=sys.stderr,
+                    )
+                    break
+                raise
+            pending = None
+            attempt = 0
+
+            data = response.get("data", [])
+            if not data:
+                complete = True
                 break
-            raise
-
-        data = response.get("data", [])
-        if not data:
-            break
-
-        # Build lookup maps from includes
-        includes = response.get("includes", {})
-        users = {u["id"]: u for u in includes.get("users", [])}
-        media = {m["media_key"]: m for m in includes.get("media", [])}
-
-        for tweet in data:
-            bookmarks.append(normalize_tweet(tweet, users, media))
-
-        remaining -= len(data)
-
-        # Check for next page
-        meta = response.get("meta", {})
-        pagination_token = meta.get("next_token")
-        if not pagination_token:
-            break
-
-    return bookmarks
+            if newer_than is not None:
+                data = [tweet for tweet in data if int(tweet["id"]) > newer_than]
+
+            if remaining is not None:
+                remaining -= len(data)
+
+            # Prefetch the next page before normalizing this one
+            meta = response.get("meta", {})
+            pagination_token = meta.get("next_token")
+            complete = not pagination_token
+            if pagination_token and (remaining is None or remaining > 0):
+                page_size = MAX_RESULTS_PER_PAGE if remaining is None else min(remaining, MAX_RESULTS_PER_PAGE)
+                cursor = pagination_token
+                pending = executor.submit(fetch_bookmarks_page, token, user_id, page_size, cursor)
+
+            bookmarks.extend(normalize_page(data, response.get("includes", _EMPTY)))
+
+    return bookmarks, complete
+
+
+def write_json(obj, pretty: bool = False):
+    """Write obj to stdout as UTF-8 JSON, bypassing print's str round trip."""
+    out = sys.stdout.buffer
+    if orjson:
+        out.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0))
+    elif pretty:
+        # Indented output is pure-Python either way, so stream it in chunks
+        for chunk in json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(obj):
+            out.write(chunk.encode())
+    else:
+        # iterencode would bypass the C encoder; one-shot dumps is ~3x faster
+        out.write(json.dumps(obj, ensure_ascii=False).encode())
+    out.write(b"\n")
+    out.flush()
+
+
+def lookup_user_id(token: str) -> str:
+    """get_me, caching the result with the stored tokens it belongs to."""
+    user_id = get_me(token)
+    if not os.environ.get("X_API_BEARER_TOKEN"):
+        cache_user_id(user_id)
+    return user_id
 
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch X bookmarks via API v2")
     parser.add_argument("-n", "--count", type=int, default=20, help="Number of bookmarks")
     parser.add_argument("--all", action="store_true", help="Fetch all bookmarks")
-    parser.add_argument("--since-id", help="Only return bookmarks after this tweet ID")
+    since = parser.add_mutually_exclusive_group()
+    since.add_argument("--since-id", type=int, help="Only return bookmarks after this tweet ID")
+    since.add_argument(
+        "--new", action="store_true",
+        help=(
+            "Only return bookmarked tweets posted after the newest one seen by the "
+            "last --new run (filters by tweet ID, so old tweets bookmarked since are "
+            f"not included; implies --all; state in {STATE_FILE})"
+        ),
+    )
     parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
 
     args = parser.parse_args()
 
     # Get token: env override > stored token
     token = os.environ.get("X_API_BEARER_TOKEN")
+    user_id = None
     if not token:
         token = get_valid_token()
+        user_id = (load_tokens() or {}).get("user_id")
     if not token:
         print(
             "No X API token found. Run x_api_auth.py first to authorize, "
@@ -174,12 +345,41 @@ def main():
         )
         sys.exit(1)
 
-    bookmarks = fetch_all_bookmarks(
-        token, count=args.count, all_pages=args.all, since_id=args.since_id
-    )
+    stored_tokens = not os.environ.get("X_API_BEARER_TOKEN")
+    cached = bool(user_id)
+    since_id = load_since_id() if args.new else args.since_id
+
+    def fetch():
+        nonlocal user_id
+        # The user ID never changes for a given authorization, so look it up once
+        if not user_id:
+            user_id = lookup_user_id(token)
+        return fetch_all_bookmarks(
+            token, count=args.count, all_pages=args.all or args.new,
+            since_id=since_id, user_id=user_id,
+        )
+
+    try:
+        bookmarks, complete = fetch()
+    except urllib.error.HTTPError as e:
+        if e.code == 401 and stored_tokens:
+            # Token rejected before its recorded expiry (e.g. revoked): refresh it
+            token = get_valid_token(force_refresh=True)
+            if not token:
+                raise
+        elif e.code == 403 and cached:
+            # A cached user ID the token can't read bookmarks for: look it up again
+            user_id = None
+        else:
+            raise
+        bookmarks, complete = fetch()
+
+    # Only advance the marker once everything newer than it has been returned,
+    # otherwise the unfetched bookmarks would be skipped by the next run
+    if args.new and complete:
+        save_since_id(bookmarks)
 
-    indent = 2 if args.pretty else None
-    print(json.dumps(bookmarks, indent=indent, ensure_ascii=False))
+    write_json(bookmarks, pretty=args.pretty)
 
 
 if __name__ == "__main__":
@@ -13,13 +13,22 @@ Tokens are saved to ~/.config/x-bookmarks/tokens.json and auto-refreshed.
 
 import argparse
 import base64
+import contextlib
+import functools
+import gzip
 import hashlib
+import http.client
 import http.server
+import io
 import json
 import os
 import secrets
+import ssl
 import sys
+import tempfile
 import threading
+import time
+import urllib.error
 import urllib.parse
 import urllib.request
 import webbrowser
@@ -34,6 +43,18 @@ TOKEN_URL = "https://api.x.com/2/oauth2/token"
 REDIRECT_PORT = 8739
 REDIRECT_URI = f"http://localhost:{REDIRECT_PORT}/callback"
 SCOPES = "tweet.read users.read bookmark.read bookmark.write offline.access"
+EXPIRY_MARGIN = 60  # seconds; refresh slightly before the token actually expires
+REQUEST_TIMEOUT = 30
+
+# PKCE S256 needs SHA-256; hashlib delegates it to OpenSSL, which picks the
+# hardware-accelerated (SHA-NI / ARMv8 crypto) implementation when available.
+assert "sha256" in hashlib.algorithms_guaranteed
+if os.environ.get("X_BOOKMARKS_DEBUG") == "1":
+    print(f"hashlib backend: {ssl.OPENSSL_VERSION}", file=sys.stderr)
+
+# Idle keep-alive connections, keyed by host, shared by auth and fetch calls
+_POOL: dict[str, list[http.client.HTTPSConnection]] = {}
+_POOL_LOCK = threading.Lock()
 
 
 def save_config(client_id: str, client_secret: str = ""):
@@ -51,11 +72,28 @@ def load_config() -> dict:
     return json.loads(CONFIG_FILE.read_text())
 
 
+def write_json_atomic(path: Path, data: dict):
+    """Write JSON to a private temp file and rename it into place, so a crash
+    mid-write can't leave a truncated file (mkstemp already creates it 0600)."""
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp", delete=False
+    ) as tmp:
+        try:
+            json.dump(data, tmp, indent=2)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, path)
+
+
 def save_tokens(tokens: dict):
     TOKEN_DIR.mkdir(parents=True, exist_ok=True)
-    TOKEN_FILE.write_text(json.dumps(tokens, indent=2))
-    os.chmod(TOKEN_FILE, 0o600)
-    print(f"Tokens saved to {TOKEN_FILE}")
+    if "expires_in" in tokens and "expires_at" not in tokens:
+        tokens["expires_at"] = time.time() + tokens["expires_in"] - EXPIRY_MARGIN
+    write_json_atomic(TOKEN_FILE, tokens)
+    print(f"Tokens saved to {TOKEN_FILE}", file=sys.stderr)
 
 
 def load_tokens() -> dict | None:
@@ -64,11 +102,105 @@ def load_tokens() -> dict | None:
     return json.loads(TOKEN_FILE.read_text())
 
 
+def cache_user_id(user_id: str):
+    """Store the authenticated user's ID alongside the tokens it belongs to."""
+    tokens = load_tokens()
+    if not tokens:
+        return
+    tokens["user_id"] = user_id
+    tokens.setdefault("expires_at", 0)  # unknown token age: don't treat it as fresh
+    save_tokens(tokens)
+
+
+def _connect(host: str) -> http.client.HTTPSConnection:
+    """New connection to host, tunnelled through HTTPS_PROXY when one is set."""
+    proxy = urllib.request.getproxies().get("https")
+    if not proxy or urllib.request.proxy_bypass(host.split(":")[0]):
+        return http.client.HTTPSConnection(host, timeout=REQUEST_TIMEOUT)
+
+    proxy = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    conn = http.client.HTTPSConnection(proxy.hostname, proxy.port or 80, timeout=REQUEST_TIMEOUT)
+    tunnel_headers = {}
+    if proxy.username:
+        creds = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+        tunnel_headers["Proxy-Authorization"] = f"Basic {base64.b64encode(creds.encode()).decode()}"
+    conn.set_tunnel(host, headers=tunnel_headers)
+    return conn
+
+
+def _release(host: str, conn: http.client.HTTPSConnection, resp: http.client.HTTPResponse):
+    if resp.isclosed() and not resp.will_close:
+        with _POOL_LOCK:
+            _POOL.setdefault(host, []).append(conn)
+    else:
+        conn.close()
+
+
+@contextlib.contextmanager
+def api_request(method: str, url: str, headers: dict = None, body: bytes = None):
+    """Send an HTTPS request over a pooled keep-alive connection.
+
+    Used like urllib.request.urlopen: yields a readable response (gzip
+    transfer compression is requested and undone transparently) and raises
+    urllib.error.HTTPError on error statuses.
+
+    Plain HTTP/1.1 keep-alive is enough here: bookmark pagination is
+    cursor-driven, so at most one request is in flight at a time and HTTP/2
+    multiplexing would have nothing to overlap.
+    """
+    parts = urllib.parse.urlsplit(url)
+    host = parts.netloc
+    target = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    headers = {"Accept-Encoding": "gzip", **(headers or {})}
+
+    with _POOL_LOCK:
+        idle = _POOL.get(host)
+        conn = idle.pop() if idle else None
+    reused = conn is not None
+    if conn is None:
+        conn = _connect(host)
+
+    try:
+        conn.request(method, target, body=body, headers=headers)
+        resp = conn.getresponse()
+    except (http.client.RemoteDisconnected, ConnectionError):
+        # The server dropped an idle connection; retry once on a fresh one
+        conn.close()
+        if not reused:
+            raise
+        conn.request(method, target, body=body, headers=headers)
+        resp = conn.getresponse()
+    except BaseException:
+        conn.close()
+        raise
+
+    gzipped = resp.headers.get("Content-Encoding") == "gzip"
+
+    if resp.status >= 400:
+        payload = resp.read()
+        _release(host, conn, resp)
+        if gzipped:
+            payload = gzip.decompress(payload)
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(payload))
+
+    try:
+        yield gzip.GzipFile(fileobj=resp) if gzipped else resp
+    finally:
+        _release(host, conn, resp)
+
+
+@functools.lru_cache(maxsize=None)
+def basic_auth_header(client_id: str, client_secret: str) -> str:
+    """HTTP Basic credentials for confidential clients (computed once per pair)."""
+    creds = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
+    return f"Basic {creds}"
+
+
 def generate_pkce():
     verifier = secrets.token_urlsafe(64)[:128]
     challenge = base64.urlsafe_b64encode(
         hashlib.sha256(verifier.encode()).digest()
-    ).rstrip(b"=").decode()
+    ).translate(None, b"=").decode("ascii")
     return verifier, challenge
 
 
@@ -81,14 +213,12 @@ def exchange_code(code: str, verifier: str, client_id: str, client_secret: str =
         "client_id": client_id,
     }).encode()
 
-    req = urllib.request.Request(TOKEN_URL, data=data, method="POST")
-    req.add_header("Content-Type", "application/x-www-form-urlencoded")
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
     if client_secret:
-        creds = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
-        req.add_header("Authorization", f"Basic {creds}")
+        headers["Authorization"] = basic_auth_header(client_id, client_secret)
 
-    with urllib.request.urlopen(req) as resp:
+    with api_request("POST", TOKEN_URL, headers, data) as resp:
         return json.loads(resp.read())
 
 
@@ -99,18 +229,16 @@ def refresh_access_token(refresh_token: str, client_id: str, client_secret: str
         "client_id": client_id,
     }).encode()
 
-    req = urllib.request.Request(TOKEN_URL, data=data, method="POST")
-    req.add_header("Content-Type", "application/x-www-form-urlencoded")
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
     if client_secret:
-        creds = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
-        req.add_header("Authorization", f"Basic {creds}")
+        headers["Authorization"] = basic_auth_header(client_id, client_secret)
 
-    with urllib.request.urlopen(req) as resp:
+    with api_request("POST", TOKEN_URL, headers, data) as resp:
         return json.loads(resp.read())
 
 
-def get_valid_token() -> str | None:
+def get_valid_token(force_refresh: bool = False) -> str | None:
     """Get a valid access token, refreshing if needed. Returns None if no tokens."""
     tokens = load_tokens()
     if not tokens:
@@ -120,6 +248,10 @@ def get_valid_token() -> str | None:
     if not config.get("client_id"):
         return None
 
+    # Still valid — skip the refresh round trip
+    if not force_refresh and tokens.get("access_token") and tokens.get("expires_at", 0) > time.time():
+        return tokens["access_token"]
+
     # Try refreshing
     if tokens.get("refresh_token"):
         try:
@@ -129,6 +261,8 @@ def get_valid_token() -> str | None:
                 config.get("client_secret", ""),
             )
             new_tokens.setdefault("refresh_token", tokens["refresh_token"])
+            if tokens.get("user_id"):
+                new_tokens.setdefault("user_id", tokens["user_id"])
             save_tokens(new_tokens)
             return new_tokens["access_token"]
         except Exception as e:
@@ -158,25 +292,25 @@ def authorize(client_id: str, client_secret: str = ""):
 
     class Handler(http.server.BaseHTTPRequestHandler):
         def do_GET(self):
-            parsed = urllib.parse.urlparse(self.path)
-            params = urllib.parse.parse_qs(parsed.query)
-
-            if parsed.path == "/callback":
-                if params.get("state", [None])[0] != state:
-                    result["error"] = "State mismatch"
-                elif "error" in params:
-                    result["error"] = params["error"][0]
-                else:
-                    result["code"] = params.get("code", [None])[0]
-
-                self.send_response(200)
-                self.send_header("Content-Type", "text/html")
-                self.end_headers()
-                msg = "✅ Authorization successful! You can close this tab." if result["code"] else f"❌ Error: {result['error']}"
-                self.wfile.write(f"<html><body><h2>{msg}</h2></body></html>".encode())
-            else:
+            # Anything but the callback (e.g. /favicon.ico) is rejected unparsed
+            if not self.path.startswith("/callback?"):
                 self.send_response(404)
                 self.end_headers()
+                return
+
+            params = dict(urllib.parse.parse_qsl(self.path.split("?", 1)[1], keep_blank_values=True))
+            if params.get("state") != state:
+                result["error"] = "State mismatch"
+            elif "error" in params:
+                result["error"] = params["error"]
+            else:
+                result["code"] = params.get("code")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            msg = "✅ Authorization successful! You can close this tab." if result["code"] else f"❌ Error: {result['error']}"
+            self.wfile.write(f"<html><body><h2>{msg}</h2></body></html>".encode())
 
         def log_message(self, *args):
             pass  # Suppress logs
@@ -232,7 +366,7 @@ def main():
 
     if args.refresh:
         save_config(args.client_id, args.client_secret)
-        token = get_valid_token()
+        token = get_valid_token(force_refresh=True)
         if token:
             print(f"✅ Token refreshed successfully")
         else: